@@ -0,0 +1,339 @@
+"""
+Query instrumentation for Galo Logistics MongoDB access
+
+Wraps a Motor database so every find/insert/replace/count call records its
+normalized query shape, duration, documents returned and (sampled via explain)
+documents examined. Slow operations are logged as structured JSON and all
+operations are aggregated per shape for the admin query-stats report.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("galo.query_stats")
+
+# Overridden by SLOW_QUERY_MS / QUERY_EXPLAIN_SAMPLE_RATE via QueryStatsRegistry.configure()
+DEFAULT_SLOW_QUERY_MS = 100.0
+DEFAULT_EXPLAIN_SAMPLE_RATE = 0.01
+
+
+def is_duplicate_key_error(error: BaseException) -> bool:
+    """True for DuplicateKeyError, or a BulkWriteError made only of duplicates"""
+    if getattr(error, "code", None) == 11000:
+        return True
+    write_errors = (getattr(error, "details", None) or {}).get("writeErrors")
+    return bool(write_errors) and all(e.get("code") == 11000 for e in write_errors)
+
+
+def configure_logging() -> None:
+    """Emit the slow-query log as bare JSON lines, outside the app's text format"""
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.propagate = False
+
+
+def normalize_shape(value: Any) -> Any:
+    """Replace literal values with placeholders, keeping keys and operators"""
+    if isinstance(value, dict):
+        return {key: normalize_shape(val) for key, val in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        # Collapse arrays so `$in: [a, b]` and `$in: [c]` share one shape
+        return [normalize_shape(value[0])] if value else []
+    return "?"
+
+
+def shape_key(collection: str, op: str, filter_: Optional[dict], sort: Any = None) -> str:
+    """Build the aggregation key for one operation"""
+    shape = {"filter": normalize_shape(filter_ or {})}
+    if sort:
+        shape["sort"] = [[key, direction] for key, direction in sort]
+    return f"{collection}.{op} {json.dumps(shape, sort_keys=True, ensure_ascii=False)}"
+
+
+@dataclass
+class ShapeStats:
+    collection: str
+    op: str
+    shape: str
+    count: int = 0
+    errors: int = 0
+    duplicate_keys: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    docs_returned: int = 0
+    docs_examined: int = 0
+    explain_samples: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "collection": self.collection,
+            "op": self.op,
+            "shape": self.shape,
+            "count": self.count,
+            "errors": self.errors,
+            # Expected conflicts (stats compare-and-swap, idempotent inserts)
+            "duplicate_keys": self.duplicate_keys,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "docs_returned": self.docs_returned,
+            # Only meaningful over the sampled subset of operations
+            "docs_examined_sampled": self.docs_examined,
+            "explain_samples": self.explain_samples,
+        }
+
+
+@dataclass
+class QueryStatsRegistry:
+    """In-process aggregation of operation statistics keyed by query shape"""
+    slow_ms: float = DEFAULT_SLOW_QUERY_MS
+    explain_sample_rate: float = DEFAULT_EXPLAIN_SAMPLE_RATE
+    shapes: Dict[str, ShapeStats] = field(default_factory=dict)
+    _explains: set = field(default_factory=set, repr=False)
+
+    def configure(self) -> None:
+        """Read the thresholds from the environment; call after .env is loaded"""
+        self.slow_ms = float(os.environ.get('SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS))
+        self.explain_sample_rate = float(os.environ.get('QUERY_EXPLAIN_SAMPLE_RATE', DEFAULT_EXPLAIN_SAMPLE_RATE))
+
+    def should_explain(self) -> bool:
+        return self.explain_sample_rate > 0 and random.random() < self.explain_sample_rate
+
+    def schedule_explain(self, collection: str, op: str, filter_: Optional[dict], explain_fn, sort: Any = None) -> None:
+        """Run a sampled explain in the background so the request never waits on it"""
+        task = asyncio.ensure_future(self._run_explain(collection, op, filter_, explain_fn, sort))
+        # Hold a reference until done; the event loop only keeps weak ones
+        self._explains.add(task)
+        task.add_done_callback(self._explains.discard)
+
+    async def _run_explain(self, collection: str, op: str, filter_: Optional[dict], explain_fn, sort: Any) -> None:
+        try:
+            docs_examined = _examined_from_explain(await explain_fn())
+        except Exception as e:
+            logger.debug(f"Explain failed on {collection}: {e}")
+            return
+        if docs_examined is None:
+            return
+        stats = self.shapes.get(shape_key(collection, op, filter_, sort))
+        if stats is not None:
+            stats.docs_examined += docs_examined
+            stats.explain_samples += 1
+
+    def record(
+        self,
+        collection: str,
+        op: str,
+        filter_: Optional[dict],
+        duration_ms: float,
+        docs_returned: int = 0,
+        sort: Any = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        key = shape_key(collection, op, filter_, sort)
+        stats = self.shapes.get(key)
+        if stats is None:
+            stats = self.shapes[key] = ShapeStats(collection=collection, op=op, shape=key)
+
+        stats.count += 1
+        stats.total_ms += duration_ms
+        stats.max_ms = max(stats.max_ms, duration_ms)
+        stats.docs_returned += docs_returned
+        if error is not None and is_duplicate_key_error(error):
+            # Callers rely on these for compare-and-swap; not a failure
+            stats.duplicate_keys += 1
+            error = None
+        elif error is not None:
+            stats.errors += 1
+
+        if duration_ms >= self.slow_ms or error is not None:
+            logger.warning(json.dumps({
+                "event": "slow_query" if error is None else "query_error",
+                "collection": collection,
+                "op": op,
+                "shape": key,
+                "duration_ms": round(duration_ms, 3),
+                "docs_returned": docs_returned,
+                "error": str(error) if error is not None else None,
+            }, ensure_ascii=False))
+
+    def top(self, limit: int = 10, order_by: str = "total_ms") -> List[Dict[str, Any]]:
+        """Return the top-N shapes ordered by the given ShapeStats attribute"""
+        ranked = sorted(self.shapes.values(), key=lambda s: getattr(s, order_by), reverse=True)
+        return [stats.to_dict() for stats in ranked[:limit]]
+
+    def reset(self) -> None:
+        self.shapes.clear()
+
+
+def _examined_from_explain(explain: dict) -> Optional[int]:
+    stats = explain.get("executionStats") or {}
+    return stats.get("totalDocsExamined")
+
+
+class InstrumentedCursor:
+    """Deferred find() that records its stats when materialized
+
+    Cursor methods other than sort() pass through to the Motor cursor and
+    keep returning this wrapper, so chains like `.skip(n).batch_size(m)` work.
+    """
+
+    def __init__(self, collection: "InstrumentedCollection", filter_: Optional[dict], args, kwargs):
+        self._collection = collection
+        self._filter = filter_
+        self._cursor = collection.raw.find(filter_, *args, **kwargs)
+        self._sort: List[Tuple[str, int]] = []
+
+    def __getattr__(self, item):
+        attr = getattr(self._cursor, item)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return self if result is self._cursor else result
+
+        return chained
+
+    def sort(self, key_or_list, direction=None):
+        self._cursor = self._cursor.sort(key_or_list, direction)
+        if isinstance(key_or_list, str):
+            self._sort.append((key_or_list, direction if direction is not None else 1))
+        else:
+            self._sort.extend(key_or_list)
+        return self
+
+    def _record(self, duration_ms: float, docs_returned: int = 0, error: Optional[BaseException] = None) -> None:
+        registry = self._collection.registry
+        registry.record(self._collection.name, "find", self._filter, duration_ms,
+                        docs_returned=docs_returned, sort=self._sort, error=error)
+        if error is None and registry.should_explain():
+            # Clone before the caller can mutate the cursor further
+            clone = self._cursor.clone()
+            registry.schedule_explain(self._collection.name, "find", self._filter, clone.explain, self._sort)
+
+    async def to_list(self, length: Optional[int]):
+        start = time.perf_counter()
+        try:
+            documents = await self._cursor.to_list(length)
+        except Exception as e:
+            self._record((time.perf_counter() - start) * 1000, error=e)
+            raise
+        self._record((time.perf_counter() - start) * 1000, docs_returned=len(documents))
+        return documents
+
+    async def __aiter__(self):
+        # Duration covers the whole iteration, including the consumer's time
+        start = time.perf_counter()
+        returned = 0
+        try:
+            async for document in self._cursor:
+                returned += 1
+                yield document
+        except Exception as e:
+            self._record((time.perf_counter() - start) * 1000, returned, error=e)
+            raise
+        self._record((time.perf_counter() - start) * 1000, returned)
+
+
+class InstrumentedCollection:
+    """Thin wrapper over a Motor collection; unknown attributes pass through"""
+
+    def __init__(self, collection, registry: QueryStatsRegistry):
+        self.raw = collection
+        self.name = collection.name
+        self.registry = registry
+
+    def __getattr__(self, item):
+        return getattr(self.raw, item)
+
+    async def _timed(self, op: str, filter_: Optional[dict], call, returned, explain_fn=None):
+        start = time.perf_counter()
+        try:
+            result = await call()
+        except Exception as e:
+            self.registry.record(self.name, op, filter_,
+                                 (time.perf_counter() - start) * 1000, error=e)
+            raise
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        self.registry.record(self.name, op, filter_, duration_ms, docs_returned=returned(result))
+        if explain_fn is not None and self.registry.should_explain():
+            self.registry.schedule_explain(self.name, op, filter_, explain_fn)
+        return result
+
+    def find(self, filter_: Optional[dict] = None, *args, **kwargs) -> InstrumentedCursor:
+        return InstrumentedCursor(self, filter_, args, kwargs)
+
+    async def find_one(self, filter_: Optional[dict] = None, *args, **kwargs):
+        def explain():
+            return self.raw.find(filter_, *args, **kwargs).limit(1).explain()
+
+        return await self._timed(
+            "find_one", filter_,
+            lambda: self.raw.find_one(filter_, *args, **kwargs),
+            lambda doc: 1 if doc else 0,
+            explain,
+        )
+
+    async def insert_one(self, document: dict, *args, **kwargs):
+        return await self._timed(
+            "insert_one", None,
+            lambda: self.raw.insert_one(document, *args, **kwargs),
+            lambda result: 0,
+        )
+
+    async def insert_many(self, documents: list, *args, **kwargs):
+        return await self._timed(
+            "insert_many", None,
+            lambda: self.raw.insert_many(documents, *args, **kwargs),
+            lambda result: 0,
+        )
+
+    async def replace_one(self, filter_: dict, replacement: dict, *args, **kwargs):
+        return await self._timed(
+            "replace_one", filter_,
+            lambda: self.raw.replace_one(filter_, replacement, *args, **kwargs),
+            lambda result: 0,
+        )
+
+    async def count_documents(self, filter_: dict, *args, **kwargs):
+        return await self._timed(
+            "count_documents", filter_,
+            lambda: self.raw.count_documents(filter_, *args, **kwargs),
+            lambda count: 0,
+        )
+
+
+class InstrumentedDatabase:
+    """Wraps a Motor database so `db.<collection>` yields instrumented collections"""
+
+    def __init__(self, database, registry: QueryStatsRegistry):
+        self.raw = database
+        self.registry = registry
+        self._collections: Dict[str, InstrumentedCollection] = {}
+
+    def __getattr__(self, name: str) -> InstrumentedCollection:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if hasattr(type(self.raw), name):
+            # Database-level methods such as command() are not collections
+            return getattr(self.raw, name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> InstrumentedCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = InstrumentedCollection(self.raw[name], self.registry)
+        return collection
+
+
+# Shared registry used by the API process and the seed script
+query_stats = QueryStatsRegistry()
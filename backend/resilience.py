@@ -0,0 +1,221 @@
+"""
+Deadlines, circuit breaking and stale-while-revalidate for Mongo reads
+
+Each public read runs under an adaptive deadline derived from its recent
+latency (smoothed mean + 4x deviation, as in TCP retransmit timers) so a slow
+Mongo fails fast instead of holding a worker for the full driver timeout. As
+in TCP, each timeout doubles the deadline (up to the maximum) until a read
+succeeds again, and half-open probes always get the maximum deadline, so a
+Mongo that has settled at a slower latency can still close the breaker.
+Consecutive failures open a per-operation circuit breaker; while it is open
+the last known good value is served and a single background probe
+revalidates it once the reset timeout has passed.
+
+The deadline is also handed to the driver through `pymongo.timeout()`, so a
+read that times out is abandoned by the Motor executor thread too rather
+than only by the awaiting request.
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import nullcontext
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger("galo.resilience")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is short-circuited by an open breaker"""
+
+
+def driver_deadline(seconds: float):
+    """Bound every driver operation in this context to `seconds`
+
+    Motor copies contextvars into its executor, so the blocking pymongo call
+    itself gives up at the deadline and frees the thread.
+    """
+    try:
+        import pymongo
+    except ImportError:
+        return nullcontext()
+    return pymongo.timeout(seconds)
+
+
+def _is_timeout(error: BaseException) -> bool:
+    # pymongo errors raised by an expired pymongo.timeout() carry timeout=True
+    return isinstance(error, asyncio.TimeoutError) or getattr(error, "timeout", False) is True
+
+
+class AdaptiveTimeout:
+    def __init__(self, initial_ms: float, min_ms: float, max_ms: float, alpha: float = 0.125, beta: float = 0.25):
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.alpha = alpha
+        self.beta = beta
+        self.srtt_ms: Optional[float] = None
+        self.rttvar_ms = initial_ms / 2
+        self._initial_ms = initial_ms
+        self._backoff_ms: Optional[float] = None
+
+    @property
+    def timeout_ms(self) -> float:
+        if self.srtt_ms is None:
+            timeout = self._initial_ms
+        else:
+            timeout = max(self.min_ms, self.srtt_ms + 4 * self.rttvar_ms)
+        if self._backoff_ms is not None:
+            timeout = max(timeout, self._backoff_ms)
+        return min(self.max_ms, timeout)
+
+    def back_off(self) -> None:
+        """Double the deadline after a timeout; cleared by the next success"""
+        self._backoff_ms = min(self.max_ms, self.timeout_ms * 2)
+
+    def observe(self, duration_ms: float) -> None:
+        self._backoff_ms = None
+        if self.srtt_ms is None:
+            self.srtt_ms = duration_ms
+            self.rttvar_ms = duration_ms / 2
+            return
+        self.rttvar_ms = (1 - self.beta) * self.rttvar_ms + self.beta * abs(self.srtt_ms - duration_ms)
+        self.srtt_ms = (1 - self.alpha) * self.srtt_ms + self.alpha * duration_ms
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN:
+            # Failed probe: stay open for another reset period
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+        elif self.state == CLOSED and self.failures >= self.failure_threshold:
+            logger.warning(f"Circuit '{self.name}' opened after {self.failures} failures")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+
+class ResilientRead:
+    """One guarded read operation with its deadline, breaker and last good value"""
+
+    def __init__(self, name: str, breaker: CircuitBreaker, timeout: AdaptiveTimeout):
+        self.name = name
+        self.breaker = breaker
+        self.timeout = timeout
+        self.last_good: Any = None
+        self.last_good_at: Optional[float] = None
+        self._revalidation: Optional[asyncio.Task] = None
+
+    async def _guarded(self, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        probe = self.breaker.state == HALF_OPEN
+        timeout_ms = self.timeout.max_ms if probe else self.timeout.timeout_ms
+
+        async def fetch_with_deadline():
+            # Entered inside the wait_for task so the deadline reaches the driver
+            with driver_deadline(timeout_ms / 1000):
+                return await fetch()
+
+        start = time.perf_counter()
+        try:
+            value = await asyncio.wait_for(fetch_with_deadline(), timeout_ms / 1000)
+        except Exception as e:
+            if _is_timeout(e):
+                self.timeout.back_off()
+            self.breaker.record_failure()
+            raise
+        self.timeout.observe((time.perf_counter() - start) * 1000)
+        self.breaker.record_success()
+        self.last_good = value
+        self.last_good_at = time.time()
+        return value
+
+    async def _revalidate(self, fetch: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            await self._guarded(fetch)
+        except Exception as e:
+            logger.warning(f"Revalidation of '{self.name}' failed: {e!r}")
+
+    async def read(self, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Fetch under the deadline, or return the last good value if short-circuited
+
+        Raises the fetch error (or CircuitOpenError) when there is nothing cached.
+        """
+        if not self.breaker.allow_request():
+            if self.last_good_at is None:
+                raise CircuitOpenError(self.name)
+            return self.last_good
+
+        if self.breaker.state == HALF_OPEN and self.last_good_at is not None:
+            # Serve stale now; the probe runs without holding this request
+            self._revalidation = asyncio.create_task(self._revalidate(fetch))
+            return self.last_good
+
+        try:
+            return await self._guarded(fetch)
+        except Exception:
+            if self.last_good_at is None:
+                raise
+            return self.last_good
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "opened_seconds_ago": (
+                round(time.monotonic() - self.breaker.opened_at, 3) if self.breaker.opened_at else None
+            ),
+            "timeout_ms": round(self.timeout.timeout_ms, 3),
+            "smoothed_latency_ms": round(self.timeout.srtt_ms, 3) if self.timeout.srtt_ms is not None else None,
+            "last_good_age_seconds": (
+                round(time.time() - self.last_good_at, 3) if self.last_good_at is not None else None
+            ),
+        }
+
+
+def resilient_read(name: str) -> ResilientRead:
+    """Build a ResilientRead configured from the READ_* environment variables"""
+    return ResilientRead(
+        name,
+        CircuitBreaker(
+            name,
+            failure_threshold=int(os.environ.get('READ_BREAKER_FAILURES', '5')),
+            reset_timeout=float(os.environ.get('READ_BREAKER_RESET_SECONDS', '30')),
+        ),
+        AdaptiveTimeout(
+            initial_ms=float(os.environ.get('READ_TIMEOUT_INITIAL_MS', '1000')),
+            min_ms=float(os.environ.get('READ_TIMEOUT_MIN_MS', '100')),
+            max_ms=float(os.environ.get('READ_TIMEOUT_MAX_MS', '2000')),
+        ),
+    )
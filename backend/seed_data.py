@@ -4,18 +4,22 @@ Seed initial data for Galo Logistics database
 import asyncio
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
-from server import CompanyStats, Testimonial, FAQ
+import server
+from server import CompanyStats, Testimonial, FAQ, STATS_DOC_ID, stats_history_entries
+from query_stats import InstrumentedDatabase, is_duplicate_key_error, query_stats
 from datetime import datetime
 from dotenv import load_dotenv
 from pathlib import Path
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
+query_stats.configure()
+server.configure_snapshots()
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+db = InstrumentedDatabase(client[os.environ['DB_NAME']], query_stats)
 
 async def seed_company_stats():
     """Seed company statistics"""
@@ -32,7 +36,13 @@ async def seed_company_stats():
     # Check if stats already exist
     existing_stats = await db.company_stats.find_one()
     if not existing_stats:
-        await db.company_stats.insert_one(stats.dict())
+        await db.company_stats.insert_one({"_id": STATS_DOC_ID, **stats.dict()})
+        try:
+            await db.company_stats_history.insert_many(stats_history_entries(stats), ordered=False)
+        except Exception as e:
+            # Rows left by an earlier, interrupted seed run are already there
+            if not is_duplicate_key_error(e):
+                raise
         print("✅ Company stats seeded")
     else:
         print("ℹ️  Company stats already exist")
@@ -121,6 +131,14 @@ async def seed_faqs():
     else:
         print(f"ℹ️  {existing_count} FAQs already exist")
 
+async def publish_snapshots():
+    """Render the public snapshots from the seeded data, as the API does after writes"""
+    server.db = db
+    versions = await server.publish_snapshots()
+    if not versions:
+        raise RuntimeError("Snapshot publishing failed")
+    print(f"✅ Snapshots published to {server.snapshot_store.directory}")
+
 async def main():
     """Run all seeding functions"""
     print("🌱 Starting database seeding...")
@@ -129,8 +147,11 @@ async def main():
         await seed_company_stats()
         await seed_testimonials()
         await seed_faqs()
+        await publish_snapshots()
         
         print("🎉 Database seeding completed successfully!")
+        for shape in query_stats.top(5):
+            print(f"   {shape['avg_ms']:8.2f} ms avg  x{shape['count']}  {shape['shape']}")
         
     except Exception as e:
         print(f"❌ Error during seeding: {e}")
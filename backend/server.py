@@ -1,27 +1,45 @@
-from fastapi import FastAPI, APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+# Imported first: starts the clock for the "import" startup phase
+from startup import IMPORT_STARTED, StartupReport
+
+import asyncio
+import time
+from fastapi import FastAPI, APIRouter, BackgroundTasks, HTTPException, Header, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from typing import Dict, List, Optional
+import re
 import uuid
 from datetime import datetime
+from query_stats import (
+    InstrumentedDatabase, configure_logging as configure_query_logging, is_duplicate_key_error, query_stats,
+)
+from resilience import ResilientRead, resilient_read
+from snapshots import SNAPSHOT_NAMES, SnapshotStore
 
 
 ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+logger = logging.getLogger(__name__)
+
+startup_report = StartupReport(started_at=IMPORT_STARTED)
+
+# MongoDB connection, created by the lifespan handler in create_app()
+client = None
+db: Optional[InstrumentedDatabase] = None
+
+# Published JSON snapshots of the public datasets; directory set in create_app()
+snapshot_store = SnapshotStore(ROOT_DIR / 'snapshots')
 
-# Create the main app without a prefix
-app = FastAPI(title="Galo Logistics API", version="1.0.0")
+# Deadline + circuit breaker + last known good value per public read, keyed
+# like the snapshots; populated in create_app() once .env is loaded
+reads: Dict[str, ResilientRead] = {}
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -50,8 +68,61 @@ class CompanyStats(BaseModel):
     daily_packages: str = "200+"
     daily_miles: str = "150+"
     service_days: str = "7"
+    version: int = 0
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class CompanyStatsHistoryEntry(BaseModel):
+    metric: str
+    value: Optional[float] = None
+    display: str
+    version: int
+    recorded_at: datetime
+
+# Display-string metrics on CompanyStats that are tracked in the history collection
+STATS_METRICS = (
+    "team_members", "years_experience", "on_time_delivery", "customer_rating",
+    "daily_packages", "daily_miles", "service_days",
+)
+
+_NUMBER_RE = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+def parse_metric_value(display: str) -> Optional[float]:
+    """Extract the numeric part of a display string, e.g. 99.2 from 99.2%"""
+    match = _NUMBER_RE.search(display.replace(",", ""))
+    return float(match.group()) if match else None
+
+def stats_history_entries(stats: CompanyStats) -> List[dict]:
+    """One typed history row per metric for a given stats version"""
+    return [
+        CompanyStatsHistoryEntry(
+            metric=metric,
+            value=parse_metric_value(getattr(stats, metric)),
+            display=getattr(stats, metric),
+            version=stats.version,
+            recorded_at=stats.updated_at,
+        ).dict()
+        for metric in STATS_METRICS
+    ]
+
+# The single stats document lives at a fixed _id so its first version can be
+# created atomically with an upsert instead of a racy find-then-insert
+STATS_DOC_ID = "company_stats"
+
+def stats_etag(version: int) -> str:
+    return f'"{version}"'
+
+def parse_if_match(if_match: str) -> Optional[int]:
+    """Return the version in an If-Match header, or None for `*`"""
+    value = if_match.strip()
+    if value == "*":
+        return None
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be a stats version ETag")
+
 class Testimonial(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -129,74 +200,178 @@ async def get_contact_submissions():
         logger.error(f"Error fetching contact submissions: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+# Data access shared by the public endpoints and snapshot publishing
+async def record_stats_history(stats: CompanyStats):
+    """Append the typed history rows for one stats version
+
+    Rows already present for this version are skipped via the unique
+    (metric, version) index. Other failures are logged rather than raised
+    because the stats document itself has already been written.
+    """
+    try:
+        await db.company_stats_history.insert_many(stats_history_entries(stats), ordered=False)
+    except Exception as e:
+        if not is_duplicate_key_error(e):
+            logger.error(f"Error recording stats history for version {stats.version}: {e}")
+
+async def fetch_company_stats() -> CompanyStats:
+    stats_data = await db.company_stats.find_one({"_id": STATS_DOC_ID})
+    if stats_data:
+        return CompanyStats(**stats_data)
+
+    # If no stats in database, create default stats
+    stats = CompanyStats()
+    try:
+        await db.company_stats.insert_one({"_id": STATS_DOC_ID, **stats.dict()})
+    except Exception as e:
+        if not is_duplicate_key_error(e):
+            raise
+        # A concurrent request created them first
+        return CompanyStats(**await db.company_stats.find_one({"_id": STATS_DOC_ID}))
+    await record_stats_history(stats)
+    return stats
+
+async def fetch_testimonials() -> List[Testimonial]:
+    testimonials = await db.testimonials.find(
+        {"is_active": True}
+    ).sort("created_at", -1).to_list(100)
+    return [Testimonial(**testimonial) for testimonial in testimonials]
+
+async def fetch_faqs() -> List[FAQ]:
+    faqs = await db.faqs.find(
+        {"is_active": True}
+    ).sort("order", 1).to_list(100)
+    return [FAQ(**faq) for faq in faqs]
+
+async def publish_snapshots() -> dict:
+    """Render the public datasets to versioned snapshot files"""
+    try:
+        datasets = {
+            "stats": await fetch_company_stats(),
+            "testimonials": await fetch_testimonials(),
+            "faqs": await fetch_faqs(),
+        }
+        return {
+            name: snapshot_store.write(name, jsonable_encoder(payload))
+            for name, payload in datasets.items()
+        }
+    except Exception as e:
+        logger.error(f"Error publishing snapshots: {e}")
+        return {}
+
 # Company Stats Endpoints
 @api_router.get("/stats", response_model=CompanyStats)
-async def get_company_stats():
+async def get_company_stats(response: Response):
     """Get current company statistics"""
     try:
-        # Try to get stats from database
-        stats_data = await db.company_stats.find_one()
-        
-        if stats_data:
-            return CompanyStats(**stats_data)
-        else:
-            # If no stats in database, create default stats
-            default_stats = CompanyStats()
-            await db.company_stats.insert_one(default_stats.dict())
-            return default_stats
+        stats = await reads["stats"].read(fetch_company_stats)
+        response.headers["ETag"] = stats_etag(stats.version)
+        return stats
             
     except Exception as e:
         logger.error(f"Error fetching company stats: {e}")
-        # Return default stats as fallback
-        return CompanyStats()
+        # Fall back to the last published snapshot, then to default stats
+        snapshot = snapshot_store.load("stats")
+        return CompanyStats(**snapshot) if snapshot else CompanyStats()
 
 @api_router.put("/stats", response_model=CompanyStats)
-async def update_company_stats(stats: CompanyStats):
-    """Update company statistics (admin endpoint)"""
+async def update_company_stats(
+    stats: CompanyStats,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    if_match: Optional[str] = Header(None),
+):
+    """Update company statistics (admin endpoint)
+
+    Compare-and-swap on `version`: the expected version comes from the
+    If-Match header (an ETag from GET /api/stats) or, failing that, from the
+    body. A stale version gets 412 with the current ETag.
+    """
     try:
+        expected = parse_if_match(if_match) if if_match else stats.version
+        if expected is None:
+            current = await db.company_stats.find_one({"_id": STATS_DOC_ID})
+            expected = current.get("version", 0) if current else 0
+
+        stats.version = expected + 1
         stats.updated_at = datetime.utcnow()
-        
-        # Update or insert stats
-        result = await db.company_stats.replace_one(
-            {},  # Update the single stats document
-            stats.dict(),
-            upsert=True
-        )
-        
-        if result.acknowledged:
-            logger.info("Company stats updated successfully")
-            return stats
-        else:
-            raise HTTPException(status_code=500, detail="Failed to update stats")
-            
+
+        # Documents written before versioning have no version field; treat as 0.
+        # Version 0 may not exist yet, so that write upserts onto the fixed _id
+        # and a concurrent creator loses with a duplicate-key error.
+        version_filter = {
+            "_id": STATS_DOC_ID,
+            "version": expected if expected else {"$in": [0, None]},
+        }
+        try:
+            result = await db.company_stats.replace_one(version_filter, stats.dict(), upsert=expected == 0)
+            conflict = result.matched_count == 0 and result.upserted_id is None
+        except Exception as e:
+            if not is_duplicate_key_error(e):
+                raise
+            conflict = True
+
+        if conflict:
+            current = await db.company_stats.find_one({"_id": STATS_DOC_ID})
+            current_version = current.get("version", 0) if current else 0
+            raise HTTPException(
+                status_code=412,
+                detail=f"Stats version {expected} is stale; current version is {current_version}",
+                headers={"ETag": stats_etag(current_version)},
+            )
+
+        await record_stats_history(stats)
+
+        logger.info(f"Company stats updated to version {stats.version}")
+        background_tasks.add_task(publish_snapshots)
+        response.headers["ETag"] = stats_etag(stats.version)
+        return stats
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating company stats: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@api_router.get("/stats/history", response_model=List[CompanyStatsHistoryEntry])
+async def get_company_stats_history(metric: str, limit: int = 100):
+    """Get the numeric history of one stats metric, oldest first"""
+    if metric not in STATS_METRICS:
+        raise HTTPException(status_code=404, detail=f"Unknown metric '{metric}'")
+    limit = max(1, min(limit, 1000))
+    try:
+        # Served from the (metric, recorded_at) index
+        entries = await db.company_stats_history.find(
+            {"metric": metric}, {"_id": 0}
+        ).sort("recorded_at", -1).to_list(limit)
+
+        return [CompanyStatsHistoryEntry(**entry) for entry in reversed(entries)]
+
+    except Exception as e:
+        logger.error(f"Error fetching stats history for {metric}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 # Testimonials Endpoints
 @api_router.get("/testimonials", response_model=List[Testimonial])
 async def get_testimonials():
     """Get all active testimonials"""
     try:
-        testimonials = await db.testimonials.find(
-            {"is_active": True}
-        ).sort("created_at", -1).to_list(100)
-        
-        return [Testimonial(**testimonial) for testimonial in testimonials]
+        return await reads["testimonials"].read(fetch_testimonials)
         
     except Exception as e:
         logger.error(f"Error fetching testimonials: {e}")
-        # Return empty list as fallback
-        return []
+        # Fall back to the last published snapshot, else an empty list
+        return [Testimonial(**t) for t in snapshot_store.load("testimonials") or []]
 
 @api_router.post("/testimonials", response_model=Testimonial)
-async def create_testimonial(testimonial_data: Testimonial):
+async def create_testimonial(testimonial_data: Testimonial, background_tasks: BackgroundTasks):
     """Create a new testimonial (admin endpoint)"""
     try:
         result = await db.testimonials.insert_one(testimonial_data.dict())
         
         if result.inserted_id:
             logger.info(f"New testimonial created for {testimonial_data.name}")
+            background_tasks.add_task(publish_snapshots)
             return testimonial_data
         else:
             raise HTTPException(status_code=500, detail="Failed to create testimonial")
@@ -210,16 +385,54 @@ async def create_testimonial(testimonial_data: Testimonial):
 async def get_faqs():
     """Get all active FAQs ordered by display order"""
     try:
-        faqs = await db.faqs.find(
-            {"is_active": True}
-        ).sort("order", 1).to_list(100)
-        
-        return [FAQ(**faq) for faq in faqs]
+        return await reads["faqs"].read(fetch_faqs)
         
     except Exception as e:
         logger.error(f"Error fetching FAQs: {e}")
-        # Return empty list as fallback
-        return []
+        # Fall back to the last published snapshot, else an empty list
+        return [FAQ(**faq) for faq in snapshot_store.load("faqs") or []]
+
+# Snapshot Endpoints
+def etag_in(if_none_match: Optional[str], etag: str) -> bool:
+    """True when an If-None-Match header lists the given ETag (weakly compared)"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in ("*", etag):
+            return True
+    return False
+
+@api_router.get("/snapshots/{name}.json")
+async def get_snapshot(name: str, if_none_match: Optional[str] = Header(None)):
+    """Serve a published snapshot file, or 304 when the client's copy is current
+
+    The file is streamed from disk without touching Mongo or Pydantic; it is
+    still read through Python in chunks, not sent with sendfile.
+    """
+    current = snapshot_store.current(name) if name in SNAPSHOT_NAMES else None
+    if current is None:
+        raise HTTPException(status_code=404, detail=f"Snapshot '{name}' not found")
+    path, version = current
+    headers = {"Cache-Control": "public, max-age=60", "ETag": f'"{version}"'}
+    if etag_in(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="application/json", headers=headers)
+
+@api_router.post("/admin/snapshots/publish")
+async def publish_snapshots_now():
+    """Re-render all snapshots, e.g. after FAQs are edited directly in Mongo (admin endpoint)"""
+    versions = await publish_snapshots()
+    if not versions:
+        raise HTTPException(status_code=503, detail="Snapshot publishing failed")
+    return {"published": versions, "manifest": snapshot_store.manifest()}
+
+@api_router.get("/admin/breakers")
+async def get_breaker_states():
+    """Get circuit breaker, deadline and cache state per public read (admin endpoint)"""
+    return {name: read.to_dict() for name, read in reads.items()}
 
 # Health check endpoint
 @api_router.get("/health")
@@ -237,24 +450,171 @@ async def health_check():
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=503, detail="Service unavailable")
 
-# Include the router in the main app
-app.include_router(api_router)
+# Query statistics endpoint
+@api_router.get("/admin/query-stats")
+async def get_query_stats(limit: int = 10, order_by: str = "total_ms"):
+    """Get the top-N MongoDB query shapes (admin endpoint)"""
+    allowed = {"total_ms", "max_ms", "count", "docs_returned", "docs_examined", "errors", "duplicate_keys"}
+    if order_by not in allowed:
+        raise HTTPException(status_code=400, detail=f"order_by must be one of {sorted(allowed)}")
+    limit = max(1, min(limit, 100))
+    return {
+        "slow_query_ms": query_stats.slow_ms,
+        "explain_sample_rate": query_stats.explain_sample_rate,
+        "shapes": query_stats.top(limit, order_by),
+    }
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Readiness endpoint
+@api_router.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once connections, indexes and caches are warm"""
+    if not startup_report.ready:
+        raise HTTPException(status_code=503, detail=f"Service {startup_report.status}")
+    return {"status": "ready"}
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+@api_router.get("/admin/startup")
+async def get_startup_report():
+    """Get the per-phase startup timing report (admin endpoint)"""
+    return startup_report.to_dict()
+
+def configure_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    configure_query_logging()
+
+async def connect_mongo():
+    """Default database hook: returns (client, database) for MONGO_URL/DB_NAME
+
+    motor/pymongo are imported here, not at module load.
+    """
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    mongo_client = AsyncIOMotorClient(
+        os.environ['MONGO_URL'],
+        serverSelectionTimeoutMS=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+    )
+    return mongo_client, mongo_client[os.environ['DB_NAME']]
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
+async def connect_db(connect_database=connect_mongo):
+    global client, db
+    client, database = await connect_database()
+    db = InstrumentedDatabase(database, query_stats)
+
+async def migrate_company_stats():
+    """Move a stats document written before versioning onto STATS_DOC_ID"""
+    if await db.company_stats.find_one({"_id": STATS_DOC_ID}):
+        return
+    legacy = await db.company_stats.find_one()
+    if legacy is None:
+        return
+
+    legacy_id = legacy.pop("_id")
+    legacy.setdefault("version", 0)
+    try:
+        await db.company_stats.insert_one({**legacy, "_id": STATS_DOC_ID})
+    except Exception as e:
+        if not is_duplicate_key_error(e):
+            raise
+    await db.company_stats.delete_one({"_id": legacy_id})
+    logger.info("Migrated company stats document to the fixed stats _id")
+
+async def ensure_indexes():
+    """Create the indexes backing the public and admin list queries"""
+    await db.testimonials.create_index([("is_active", 1), ("created_at", -1)])
+    await db.faqs.create_index([("is_active", 1), ("order", 1)])
+    await db.contact_submissions.create_index([("submitted_at", -1)])
+    await db.company_stats_history.create_index([("metric", 1), ("recorded_at", -1)])
+    await db.company_stats_history.create_index([("metric", 1), ("version", 1)], unique=True)
+
+async def warm_caches():
+    """Run the public reads once so the pool and Mongo working set are hot"""
+    await client.admin.command('ping')
+    # Seed the last-known-good values, then refresh the snapshot files
+    await reads["stats"].read(fetch_company_stats)
+    await reads["testimonials"].read(fetch_testimonials)
+    await reads["faqs"].read(fetch_faqs)
+    if not await publish_snapshots():
+        raise RuntimeError("Snapshot publishing failed")
+
+async def run_startup_tasks() -> bool:
+    """Build indexes and warm caches; marks the service ready only if both succeed"""
+    succeeded = True
+    for phase, task in (("migrate", migrate_company_stats), ("indexes", ensure_indexes), ("warm", warm_caches)):
+        try:
+            with startup_report.phase(phase):
+                await task()
+        except Exception as e:
+            startup_report.record_error(phase, e)
+            succeeded = False
+    if succeeded:
+        startup_report.mark_ready()
+    return succeeded
+
+async def retry_startup_tasks():
+    """Run the warm-up until it succeeds, backing off; /api/ready is 503 until then"""
+    delay = float(os.environ.get('STARTUP_RETRY_SECONDS', '5'))
+    while not await run_startup_tasks():
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 60)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with startup_report.phase("connect"):
+        await connect_db(app.state.connect_database)
+
+    # Accept connections right away: migration, indexes and warm-up run in the
+    # background and /api/ready gates traffic; reads have their own fallbacks
+    warm_up = asyncio.create_task(retry_startup_tasks())
+
+    yield
+
+    warm_up.cancel()
     client.close()
+
+def configure_snapshots() -> None:
+    """Point the snapshot store at SNAPSHOT_DIR; call after .env is loaded"""
+    snapshot_store.directory = Path(os.environ.get('SNAPSHOT_DIR', ROOT_DIR / 'snapshots'))
+
+def create_app(connect_database=connect_mongo) -> FastAPI:
+    """App factory; run with `uvicorn --factory server:create_app`
+
+    Importing this module does not build an app, load .env or configure
+    logging, so scripts such as seed_data.py can import the models cheaply.
+    `connect_database` is an async hook returning (client, database), used
+    by the lifespan handler; benchmarks pass one for an in-memory database.
+    """
+    started = time.perf_counter()
+    load_dotenv(ROOT_DIR / '.env')
+    configure_logging()
+    query_stats.configure()
+    configure_snapshots()
+    reads.update({name: resilient_read(name) for name in SNAPSHOT_NAMES})
+
+    # Create the main app without a prefix
+    app = FastAPI(title="Galo Logistics API", version="1.0.0", lifespan=lifespan)
+    app.state.connect_database = connect_database
+
+    # Include the router in the main app
+    app.include_router(api_router)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    startup_report.record("create_app", started)
+    return app
+
+startup_report.record("import", IMPORT_STARTED)
+
+def __getattr__(name: str):
+    """Build `app` on first access so `uvicorn server:app` keeps working"""
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,149 @@
+"""
+Precomputed JSON snapshots of the landing-page API data
+
+After every write to stats, testimonials or FAQs the API renders each public
+dataset to a content-addressed file (`<name>.<hash>.json`) plus a stable
+`<name>.json` copy and a `manifest.json` index. /api/snapshots/<name>.json
+streams these files from disk (no Mongo query or model validation per request,
+and 304 for a matching If-None-Match), and the frontend build can pick them
+up by pointing SNAPSHOT_DIR at it.
+
+Several API workers may publish at once: files are written through unique
+temp files, manifest updates are serialized with a lock file, and the
+served ETag is derived from the served file's own content hash.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("galo.snapshots")
+
+SNAPSHOT_NAMES = ("stats", "testimonials", "faqs")
+
+# Versioned files kept per dataset so in-flight readers never lose their file
+KEEP_VERSIONS = 5
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _content_version(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+class SnapshotStore:
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        # name -> ((inode, mtime_ns, size) of <name>.json, content version)
+        self._versions: Dict[str, Tuple[Tuple[int, int, int], str]] = {}
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / "manifest.json"
+
+    def current_path(self, name: str) -> Path:
+        return self.directory / f"{name}.json"
+
+    def manifest(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self.manifest_path.read_bytes())
+        except (OSError, ValueError):
+            return {}
+
+    def current(self, name: str) -> Optional[Tuple[Path, str]]:
+        """Return (file to serve, content version) for the published snapshot
+
+        The version is hashed from <name>.json itself (cached per inode, which
+        every publish replaces), and the immutable <name>.<version>.json is
+        served so the body can never drift from the ETag.
+        """
+        path = self.current_path(name)
+        try:
+            stat = path.stat()
+            key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            cached = self._versions.get(name)
+            if cached is None or cached[0] != key:
+                cached = self._versions[name] = (key, _content_version(path.read_bytes()))
+        except OSError:
+            return None
+
+        version = cached[1]
+        versioned = self.directory / f"{name}.{version}.json"
+        return (versioned if versioned.exists() else path), version
+
+    @contextmanager
+    def _lock(self):
+        """Serialize manifest read-modify-write across worker processes"""
+        with open(self.directory / ".publish.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def write(self, name: str, payload: Any) -> str:
+        """Render one dataset; returns its content version"""
+        if name not in SNAPSHOT_NAMES:
+            raise ValueError(f"Unknown snapshot '{name}'")
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        version = _content_version(data)
+
+        with self._lock():
+            current = self.current(name)
+            if current is not None and current[1] == version:
+                return version
+
+            _atomic_write(self.directory / f"{name}.{version}.json", data)
+            _atomic_write(self.current_path(name), data)
+
+            manifest = self.manifest()
+            manifest[name] = {
+                "version": version,
+                "file": f"{name}.{version}.json",
+                "bytes": len(data),
+                "published_at": datetime.utcnow().isoformat(),
+            }
+            _atomic_write(self.manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+            self._prune(name, keep=manifest[name]["file"])
+
+        logger.info(f"Published {name} snapshot {version} ({len(data)} bytes)")
+        return version
+
+    def load(self, name: str) -> Optional[Any]:
+        """Read the current snapshot back, or None if it was never published"""
+        try:
+            return json.loads(self.current_path(name).read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    def _prune(self, name: str, keep: str) -> None:
+        versions = sorted(
+            (p for p in self.directory.glob(f"{name}.*.json") if p.name != keep),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for stale in versions[KEEP_VERSIONS - 1:]:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,74 @@
+"""
+Startup timing for the Galo Logistics API
+
+Records how long each boot phase (module import, app creation, Mongo connect,
+index build, cache warm-up) takes, and checks that heavy packages pulled in by
+requirements.txt never load on the serving path. For a per-module breakdown of
+the import phase run `python -X importtime -c "import server"`.
+"""
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+# server.py imports this module first (its own stdlib imports are negligible),
+# so this marks the start of the "import" phase
+IMPORT_STARTED = time.perf_counter()
+
+logger = logging.getLogger("galo.startup")
+
+# Installed for scripts and tooling only; none of these belong in the API process
+HEAVY_MODULES = ("pandas", "numpy", "boto3", "botocore", "jq")
+
+
+@dataclass
+class StartupReport:
+    started_at: float = field(default_factory=time.perf_counter)
+    phases: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    ready: bool = False
+
+    @property
+    def status(self) -> str:
+        """One of starting, degraded (a startup phase failed) or ready"""
+        if self.ready:
+            return "ready"
+        return "degraded" if self.errors else "starting"
+
+    def record(self, phase: str, started: float) -> None:
+        self.phases[phase] = round((time.perf_counter() - started) * 1000, 3)
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started)
+
+    def record_error(self, phase: str, error: Exception) -> None:
+        self.errors[phase] = repr(error)
+        logger.error(json.dumps({"event": "startup_phase_failed", "phase": phase, "error": repr(error)}))
+
+    def heavy_modules_loaded(self) -> List[str]:
+        return [name for name in HEAVY_MODULES if name in sys.modules]
+
+    def mark_ready(self) -> None:
+        self.ready = True
+        self.record("total", self.started_at)
+        loaded = self.heavy_modules_loaded()
+        if loaded:
+            logger.warning(f"Heavy modules loaded on the serving path: {', '.join(loaded)}")
+        logger.info(json.dumps({"event": "startup_complete", **self.to_dict()}))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "ready": self.ready,
+            "errors": dict(self.errors),
+            "phases_ms": dict(self.phases),
+            "heavy_modules_loaded": self.heavy_modules_loaded(),
+        }
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the Galo Logistics API
+
+Runs in-process against backend/server.py through httpx's ASGI transport, so
+no server needs to be started. By default Mongo is replaced by an in-memory
+stand-in; set BENCH_MONGO_URL to benchmark against a local Mongo instead
+(a throwaway `galo_bench` database is used and dropped afterwards).
+
+Covers:
+  - model construction for ContactSubmission, Testimonial and FAQ
+  - validation + JSON serialization of 10/100/1000 documents
+  - per-route latency for every route in server.py
+  - snapshot publishing on its own (POST /api/admin/snapshots/publish)
+  - end-to-end requests/second on the public reads under concurrency
+
+Usage:
+  python benchmarks/bench_api.py --save-baseline          # run, store as the baseline
+  python benchmarks/bench_api.py                          # run, compare to the baseline
+  python benchmarks/bench_api.py --baseline benchmarks/baseline.json --threshold 0.2
+
+The ASGI transport returns only after a route's background tasks have run,
+so the PUT /api/stats and POST /api/testimonials latencies include the
+snapshot publish they schedule; compare them against the publish route's
+own latency to see how much is publishing.
+
+Exits with status 1 if any metric is worse than the baseline by more than the
+threshold (a fraction, 0.2 = 20%), if there is no baseline (unless
+--save-baseline is given), or if the baseline used a different backend,
+--scale or --duration.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from copy import deepcopy
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT_DIR / 'backend'))
+
+# Must be set before the server module reads its environment
+os.environ['DB_NAME'] = 'galo_bench'
+os.environ['SNAPSHOT_DIR'] = tempfile.mkdtemp(prefix='galo-bench-snapshots-')
+os.environ.setdefault('QUERY_EXPLAIN_SAMPLE_RATE', '0')
+
+import httpx  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+import server  # noqa: E402
+
+
+# =================== IN-MEMORY MONGO STAND-IN ===================
+
+class _Result:
+    def __init__(self, **kwargs):
+        self.acknowledged = True
+        self.__dict__.update(kwargs)
+
+
+class DuplicateKey(Exception):
+    """Stand-in for pymongo's DuplicateKeyError; server.py only checks the code"""
+    code = 11000
+
+
+def _matches(document: dict, filter_: dict) -> bool:
+    for key, condition in (filter_ or {}).items():
+        value = document.get(key)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$exists" in condition and (key in document) != condition["$exists"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, documents: List[dict], projection: dict = None):
+        self._documents = documents
+        self._projection = projection or {}
+        self._limit = 0
+
+    def sort(self, key_or_list, direction=None):
+        keys = [(key_or_list, direction or 1)] if isinstance(key_or_list, str) else list(key_or_list)
+        for key, key_direction in reversed(keys):
+            self._documents.sort(key=lambda d: d.get(key), reverse=key_direction < 0)
+        return self
+
+    def limit(self, limit: int):
+        self._limit = limit
+        return self
+
+    def clone(self):
+        cursor = FakeCursor(list(self._documents), self._projection)
+        cursor._limit = self._limit
+        return cursor
+
+    async def to_list(self, length):
+        limits = [n for n in (self._limit, length) if n]
+        documents = self._documents[:min(limits)] if limits else self._documents
+        hidden = {key for key, include in self._projection.items() if not include}
+        return [{k: v for k, v in doc.items() if k not in hidden} for doc in documents]
+
+    async def explain(self):
+        return {"executionStats": {"totalDocsExamined": len(self._documents)}}
+
+
+class FakeCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.documents: List[dict] = []
+
+    def find(self, filter_=None, projection=None):
+        return FakeCursor([deepcopy(d) for d in self.documents if _matches(d, filter_)], projection)
+
+    async def find_one(self, filter_=None, *args, **kwargs):
+        for document in self.documents:
+            if _matches(document, filter_):
+                return deepcopy(document)
+        return None
+
+    async def insert_one(self, document: dict):
+        document.setdefault("_id", uuid.uuid4().hex)
+        if any(d["_id"] == document["_id"] for d in self.documents):
+            raise DuplicateKey()
+        self.documents.append(deepcopy(document))
+        return _Result(inserted_id=document["_id"])
+
+    async def insert_many(self, documents: list, ordered: bool = True):
+        ids = [(await self.insert_one(document)).inserted_id for document in documents]
+        return _Result(inserted_ids=ids)
+
+    async def replace_one(self, filter_: dict, replacement: dict, upsert: bool = False):
+        for index, document in enumerate(self.documents):
+            if _matches(document, filter_):
+                self.documents[index] = {"_id": document["_id"], **deepcopy(replacement)}
+                return _Result(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            upserted = {"_id": filter_["_id"]} if "_id" in filter_ else {}
+            result = await self.insert_one({**upserted, **replacement})
+            return _Result(matched_count=0, modified_count=0, upserted_id=result.inserted_id)
+        return _Result(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def delete_one(self, filter_: dict):
+        for index, document in enumerate(self.documents):
+            if _matches(document, filter_):
+                del self.documents[index]
+                return _Result(deleted_count=1)
+        return _Result(deleted_count=0)
+
+    async def count_documents(self, filter_: dict):
+        return sum(1 for d in self.documents if _matches(d, filter_))
+
+    async def create_index(self, keys, **kwargs):
+        return "_".join(f"{key}_{direction}" for key, direction in keys)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(name)
+        return self._collections[name]
+
+
+class FakeAdmin:
+    async def command(self, name: str):
+        return {"ok": 1.0}
+
+
+class FakeClient:
+    admin = FakeAdmin()
+
+    def close(self):
+        pass
+
+
+# =================== FIXTURES ===================
+
+def testimonial_doc(i: int) -> dict:
+    return server.Testimonial(
+        name=f"Customer {i}",
+        location="Boca Raton, FL",
+        quote="Galo Logistics always delivers on time and with a smile. " * 2,
+        rating=5,
+        created_at=datetime(2024, 1, 1) + timedelta(minutes=i),
+    ).dict()
+
+
+def faq_doc(i: int) -> dict:
+    return server.FAQ(
+        question=f"Question number {i}?",
+        answer="We provide delivery services throughout Palm Beach County. " * 3,
+        order=i,
+    ).dict()
+
+
+def database_hook(mongo_url: str = None):
+    """Build the create_app() database hook; returns (hook, teardown)
+
+    The hook seeds a fresh database before the app's lifespan migrates,
+    indexes and warms it, so startup is benchmarked on the real path.
+    """
+    opened = {}
+
+    async def connect_database():
+        if mongo_url:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            client = AsyncIOMotorClient(mongo_url)
+            await client.drop_database(os.environ['DB_NAME'])
+            database = client[os.environ['DB_NAME']]
+        else:
+            client, database = FakeClient(), FakeDatabase()
+
+        await database["testimonials"].insert_many([testimonial_doc(i) for i in range(20)])
+        await database["faqs"].insert_many([faq_doc(i) for i in range(6)])
+        opened["client"] = client
+        return client, database
+
+    async def teardown():
+        # Runs inside the lifespan, before it closes the client
+        if mongo_url and "client" in opened:
+            await opened["client"].drop_database(os.environ['DB_NAME'])
+
+    return connect_database, teardown
+
+
+# =================== MEASUREMENT ===================
+
+def time_per_op_us(fn: Callable[[], Any], number: int, repeat: int = 5) -> float:
+    """Best-of-`repeat` mean time per call, in microseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
+
+
+def bench_models(results: Dict[str, dict], scale: float) -> None:
+    cases = {
+        "ContactSubmission": lambda: server.ContactSubmission(
+            name="Jane Doe", email="jane@example.com", message="Interested in driving for Galo."),
+        "Testimonial": lambda: server.Testimonial(
+            name="Maria Rodriguez", location="Boca Raton, FL", quote="Best DSP in South Florida!", rating=5),
+        "FAQ": lambda: server.FAQ(
+            question="What areas do you service?", answer="All of Palm Beach County.", order=1),
+    }
+    for name, fn in cases.items():
+        results[f"model.{name}"] = metric(time_per_op_us(fn, int(2000 * scale)), "us/op")
+
+
+def bench_serialization(results: Dict[str, dict], scale: float) -> None:
+    for model, factory in (("Testimonial", testimonial_doc), ("FAQ", faq_doc)):
+        cls = getattr(server, model)
+        for size in (10, 100, 1000):
+            documents = [factory(i) for i in range(size)]
+
+            # Same work as a list endpoint: validate raw documents, then encode
+            def serialize():
+                return json.dumps(jsonable_encoder([cls(**d) for d in documents])).encode()
+
+            number = max(1, int(2000 * scale / size))
+            results[f"serialize.{model}.{size}"] = metric(time_per_op_us(serialize, number), "us/op")
+
+
+def route_cases() -> List[tuple]:
+    contact = {"name": "Jane Doe", "email": "jane@example.com", "message": "Hello from the benchmark"}
+    testimonial = {"name": "Bench", "location": "Delray Beach, FL", "quote": "Fast.", "rating": 5}
+    stats = server.CompanyStats().dict()
+    stats["updated_at"] = stats["updated_at"].isoformat()
+    return [
+        ("GET", "/api/", None, {}),
+        ("POST", "/api/status", {"client_name": "bench"}, {}),
+        ("GET", "/api/status", None, {}),
+        ("POST", "/api/contact", contact, {}),
+        ("GET", "/api/contact", None, {}),
+        ("GET", "/api/stats", None, {}),
+        ("PUT", "/api/stats", stats, {"If-Match": "*"}),
+        ("GET", "/api/stats/history?metric=on_time_delivery", None, {}),
+        ("GET", "/api/testimonials", None, {}),
+        ("POST", "/api/testimonials", testimonial, {}),
+        ("GET", "/api/faqs", None, {}),
+        ("GET", "/api/snapshots/faqs.json", None, {}),
+        ("POST", "/api/admin/snapshots/publish", None, {}),
+        ("GET", "/api/health", None, {}),
+        ("GET", "/api/ready", None, {}),
+        ("GET", "/api/admin/query-stats", None, {}),
+        ("GET", "/api/admin/startup", None, {}),
+        ("GET", "/api/admin/breakers", None, {}),
+    ]
+
+
+async def bench_routes(client: httpx.AsyncClient, results: Dict[str, dict], scale: float) -> None:
+    requests_per_route = max(5, int(200 * scale))
+    for method, url, body, headers in route_cases():
+        latencies = []
+        for _ in range(requests_per_route):
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body, headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method} {url} returned {response.status_code}: {response.text}")
+        latencies.sort()
+        key = f"route.{method} {url}"
+        results[f"{key}.p50"] = metric(statistics.median(latencies), "ms")
+        results[f"{key}.p95"] = metric(latencies[int(len(latencies) * 0.95) - 1], "ms")
+
+
+async def bench_throughput(client: httpx.AsyncClient, results: Dict[str, dict], duration: float) -> None:
+    for url in ("/api/stats", "/api/testimonials", "/api/faqs"):
+        for concurrency in (1, 16, 64):
+            completed = 0
+            deadline = time.perf_counter() + duration
+
+            async def worker():
+                nonlocal completed
+                while time.perf_counter() < deadline:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                    completed += 1
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+            results[f"rps.GET {url}.c{concurrency}"] = metric(completed / elapsed, "req/s", higher_is_better=True)
+
+
+def metric(value: float, unit: str, higher_is_better: bool = False) -> dict:
+    return {"value": round(value, 3), "unit": unit, "higher_is_better": higher_is_better}
+
+
+# =================== BASELINE COMPARISON ===================
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 30.0) -> dict:
+    """Poll the startup report until the background warm-up has finished"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        report = (await client.get("/api/admin/startup")).json()
+        if report["status"] == "ready":
+            return report
+        if time.perf_counter() >= deadline:
+            raise RuntimeError(f"App did not become ready within {timeout}s: {report['errors']}")
+        await asyncio.sleep(0.01)
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Return a description of every metric that regressed beyond the threshold"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous["value"]:
+            continue
+        change = (current["value"] - previous["value"]) / previous["value"]
+        if current["higher_is_better"]:
+            change = -change
+        if change > threshold:
+            regressions.append(
+                f"{name}: {previous['value']} -> {current['value']} {current['unit']} ({change:+.1%} worse)"
+            )
+    return regressions
+
+
+async def run(args) -> Dict[str, dict]:
+    results: Dict[str, dict] = {}
+
+    print("=== Model construction ===")
+    bench_models(results, args.scale)
+    print("=== Serialization ===")
+    bench_serialization(results, args.scale)
+
+    connect_database, teardown = database_hook(args.mongo_url)
+    app = server.create_app(connect_database=connect_database)
+
+    print("=== Startup ===")
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        results["startup.lifespan"] = metric((time.perf_counter() - start) * 1000, "ms")
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                report = await wait_until_ready(client)
+                results["startup.ready"] = metric((time.perf_counter() - start) * 1000, "ms")
+                for phase, duration_ms in report["phases_ms"].items():
+                    results[f"startup.{phase}"] = metric(duration_ms, "ms")
+
+                print("=== Routes ===")
+                await bench_routes(client, results, args.scale)
+                print("=== Throughput ===")
+                await bench_throughput(client, results, args.duration)
+        finally:
+            await teardown()
+
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Galo Logistics API benchmarks")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", type=Path, default=BENCH_DIR / "baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=float(os.environ.get('BENCH_REGRESSION_THRESHOLD', '0.2')))
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for iteration counts")
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds per throughput run")
+    parser.add_argument("--mongo-url", default=os.environ.get('BENCH_MONGO_URL'),
+                        help="benchmark against this Mongo instead of the in-memory stand-in")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": "mongo" if args.mongo_url else "in-memory",
+            "scale": args.scale,
+            "duration": args.duration,
+        },
+        "results": results,
+    }
+
+    output = args.output or BENCH_DIR / "results" / f"{datetime.utcnow():%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+    for name, result in results.items():
+        print(f"  {name:<60} {result['value']:>12} {result['unit']}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"\n❌ No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 1
+
+    baseline = json.loads(args.baseline.read_text())
+    for setting in ("backend", "scale", "duration"):
+        if baseline["meta"].get(setting) != report["meta"][setting]:
+            print(f"\n❌ Baseline was recorded with {setting}={baseline['meta'].get(setting)}, "
+                  f"this run used {setting}={report['meta'][setting]}; refusing to compare")
+            return 1
+
+    regressions = compare(results, baseline["results"], args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+
+    print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
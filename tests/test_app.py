@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("email_validator")
+
+from fastapi import FastAPI, HTTPException  # noqa: E402
+
+import server  # noqa: E402
+from startup import StartupReport  # noqa: E402
+
+
+class StubClient:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class StubDatabase:
+    def __getitem__(self, name):
+        raise AssertionError("startup tasks are stubbed out")
+
+
+def test_importing_server_does_not_build_an_app():
+    assert "app" not in vars(server) or isinstance(vars(server)["app"], FastAPI)
+
+
+def test_module_app_is_built_lazily_once(monkeypatch):
+    monkeypatch.delitem(vars(server), "app", raising=False)
+    app = server.app
+    assert isinstance(app, FastAPI)
+    assert server.app is app
+
+
+def test_readiness_follows_the_startup_report(monkeypatch):
+    report = StartupReport()
+    monkeypatch.setattr(server, "startup_report", report)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(server.readiness_check())
+    assert exc_info.value.status_code == 503
+
+    report.record_error("warm", RuntimeError("mongo down"))
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(server.readiness_check())
+    assert "degraded" in exc_info.value.detail
+
+    report.mark_ready()
+    assert asyncio.run(server.readiness_check()) == {"status": "ready"}
+
+
+def test_lifespan_serves_before_warm_up_finishes(monkeypatch):
+    stub_client = StubClient()
+
+    async def connect_database():
+        return stub_client, StubDatabase()
+
+    async def scenario():
+        release = asyncio.Event()
+        attempts = []
+
+        async def slow_startup_tasks():
+            attempts.append(1)
+            await release.wait()
+            return True
+
+        monkeypatch.setattr(server, "run_startup_tasks", slow_startup_tasks)
+        app = server.create_app(connect_database=connect_database)
+
+        async with app.router.lifespan_context(app):
+            # Startup returned control while the warm-up is still pending
+            await asyncio.sleep(0)
+            assert attempts == [1]
+            release.set()
+            await asyncio.sleep(0)
+        assert stub_client.closed
+
+    asyncio.run(scenario())
+
+
+def test_snapshot_is_not_resent_when_the_etag_matches(tmp_path, monkeypatch):
+    from snapshots import SnapshotStore
+
+    store = SnapshotStore(tmp_path)
+    version = store.write("faqs", [])
+    monkeypatch.setattr(server, "snapshot_store", store)
+
+    response = asyncio.run(server.get_snapshot("faqs", if_none_match=f'W/"{version}", "other"'))
+    assert response.status_code == 304
+    assert response.headers["ETag"] == f'"{version}"'
+
+    response = asyncio.run(server.get_snapshot("faqs", if_none_match='"stale"'))
+    assert response.status_code == 200
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+
+from query_stats import (
+    InstrumentedCollection, InstrumentedDatabase, QueryStatsRegistry, normalize_shape, shape_key,
+)
+
+
+class DuplicateKey(Exception):
+    code = 11000
+
+
+class StubCursor:
+    def __init__(self, documents):
+        self.documents = list(documents)
+        self.sorted_by = None
+        self.skipped = 0
+
+    def sort(self, key_or_list, direction=None):
+        self.sorted_by = (key_or_list, direction)
+        return self
+
+    def skip(self, n):
+        self.skipped = n
+        self.documents = self.documents[n:]
+        return self
+
+    @property
+    def alive(self):
+        return True
+
+    def clone(self):
+        return StubCursor(self.documents)
+
+    async def to_list(self, length):
+        return self.documents[:length] if length else self.documents
+
+    async def explain(self):
+        return {"executionStats": {"totalDocsExamined": 42}}
+
+    def __aiter__(self):
+        async def iterate():
+            for document in self.documents:
+                yield document
+        return iterate()
+
+
+class StubCollection:
+    name = "faqs"
+
+    def __init__(self, documents=(), insert_error=None):
+        self.documents = list(documents)
+        self.insert_error = insert_error
+
+    def find(self, filter_=None):
+        return StubCursor(self.documents)
+
+    async def insert_one(self, document):
+        if self.insert_error:
+            raise self.insert_error
+        return document
+
+    def watch(self):
+        return "change-stream"
+
+
+class StubDatabase:
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, StubCollection())
+
+    def command(self, name):
+        return f"ran {name}"
+
+
+def registry(**kwargs):
+    return QueryStatsRegistry(**{"slow_ms": 1e9, "explain_sample_rate": 0, **kwargs})
+
+
+def test_normalize_shape_drops_literals_and_collapses_arrays():
+    assert normalize_shape({"b": 1, "a": {"$in": [1, 2, 3]}}) == {"a": {"$in": ["?"]}, "b": "?"}
+    assert shape_key("faqs", "find", {"x": 1}) == shape_key("faqs", "find", {"x": 2})
+    assert shape_key("faqs", "find", {"x": 1}, [("order", 1)]) != shape_key("faqs", "find", {"x": 1})
+
+
+def test_cursor_captures_sort_and_passes_through_other_methods():
+    async def scenario():
+        stats = registry()
+        collection = InstrumentedCollection(StubCollection([{"n": i} for i in range(5)]), stats)
+        cursor = collection.find({"is_active": True}).sort("order", 1).skip(2)
+        assert cursor.alive is True
+        assert await cursor.to_list(10) == [{"n": 2}, {"n": 3}, {"n": 4}]
+
+        [shape] = stats.top()
+        assert shape["shape"] == shape_key("faqs", "find", {"is_active": True}, [("order", 1)])
+        assert shape["count"] == 1
+        assert shape["docs_returned"] == 3
+
+    asyncio.run(scenario())
+
+
+def test_async_iteration_is_recorded():
+    async def scenario():
+        stats = registry()
+        collection = InstrumentedCollection(StubCollection([{"n": i} for i in range(4)]), stats)
+        assert [d["n"] async for d in collection.find({})] == [0, 1, 2, 3]
+        [shape] = stats.top()
+        assert shape["docs_returned"] == 4
+
+    asyncio.run(scenario())
+
+
+def test_explain_runs_in_the_background():
+    async def scenario():
+        stats = registry(explain_sample_rate=1)
+        collection = InstrumentedCollection(StubCollection([{"n": 1}]), stats)
+        await collection.find({}).to_list(10)
+        assert stats.top()[0]["explain_samples"] == 0
+        await asyncio.gather(*stats._explains)
+        shape = stats.top()[0]
+        assert shape["explain_samples"] == 1
+        assert shape["docs_examined_sampled"] == 42
+
+    asyncio.run(scenario())
+
+
+def test_slow_log_threshold_emits_json(caplog):
+    stats = registry(slow_ms=50)
+    with caplog.at_level(logging.WARNING, logger="galo.query_stats"):
+        stats.record("faqs", "find", {}, 10)
+        stats.record("faqs", "find", {}, 60, docs_returned=3)
+    [record] = caplog.records
+    payload = json.loads(record.getMessage())
+    assert payload["event"] == "slow_query"
+    assert payload["docs_returned"] == 3
+
+
+def test_duplicate_keys_are_counted_but_not_logged(caplog):
+    async def scenario():
+        stats = registry()
+        collection = InstrumentedCollection(StubCollection(insert_error=DuplicateKey()), stats)
+        try:
+            await collection.insert_one({"_id": "x"})
+        except DuplicateKey:
+            pass
+        return stats
+
+    with caplog.at_level(logging.WARNING, logger="galo.query_stats"):
+        stats = asyncio.run(scenario())
+        stats.record("faqs", "insert_one", None, 1, error=RuntimeError("boom"))
+    shape = stats.top()[0]
+    assert shape["duplicate_keys"] == 1
+    assert shape["errors"] == 1
+    assert [json.loads(r.getMessage())["event"] for r in caplog.records] == ["query_error"]
+
+
+def test_configure_reads_environment(monkeypatch):
+    monkeypatch.setenv("SLOW_QUERY_MS", "5")
+    monkeypatch.setenv("QUERY_EXPLAIN_SAMPLE_RATE", "0.5")
+    stats = QueryStatsRegistry()
+    stats.configure()
+    assert stats.slow_ms == 5
+    assert stats.explain_sample_rate == 0.5
+
+
+def test_database_separates_collections_from_methods():
+    database = InstrumentedDatabase(StubDatabase(), registry())
+    assert isinstance(database.faqs, InstrumentedCollection)
+    assert database.faqs is database["faqs"]
+    assert database.command("ping") == "ran ping"
+    # Collection methods that are not instrumented pass through
+    assert database.faqs.watch() == "change-stream"
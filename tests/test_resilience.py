@@ -0,0 +1,165 @@
+import asyncio
+import logging
+
+import pytest
+
+from resilience import (
+    CLOSED, HALF_OPEN, OPEN, AdaptiveTimeout, CircuitBreaker, CircuitOpenError, ResilientRead,
+)
+
+
+def make_read(failure_threshold=2, reset_timeout=0.05, initial_ms=50, min_ms=10, max_ms=200):
+    return ResilientRead(
+        "stats",
+        CircuitBreaker("stats", failure_threshold=failure_threshold, reset_timeout=reset_timeout),
+        AdaptiveTimeout(initial_ms=initial_ms, min_ms=min_ms, max_ms=max_ms),
+    )
+
+
+def fetch_after(delay, value):
+    async def fetch():
+        await asyncio.sleep(delay)
+        return value
+    return fetch
+
+
+async def failing_fetch():
+    raise RuntimeError("mongo down")
+
+
+def test_breaker_opens_serves_stale_and_closes_after_probe():
+    async def scenario():
+        read = make_read()
+        assert await read.read(fetch_after(0, "v1")) == "v1"
+
+        # CLOSED -> OPEN after the failure threshold, serving the last good value
+        assert await read.read(failing_fetch) == "v1"
+        assert read.breaker.state == CLOSED
+        assert await read.read(failing_fetch) == "v1"
+        assert read.breaker.state == OPEN
+
+        # Short-circuited while open
+        assert await read.read(fetch_after(0, "v2")) == "v1"
+        assert read.breaker.state == OPEN
+
+        # OPEN -> HALF_OPEN after the reset timeout; stale value served while probing
+        await asyncio.sleep(0.06)
+        assert await read.read(fetch_after(0, "v2")) == "v1"
+        assert read.breaker.state == HALF_OPEN
+        await read._revalidation
+
+        # HALF_OPEN -> CLOSED once the probe succeeds
+        assert read.breaker.state == CLOSED
+        assert await read.read(fetch_after(0, "v3")) == "v3"
+
+    asyncio.run(scenario())
+
+
+def test_failed_probe_reopens_without_logging_again(caplog):
+    async def scenario():
+        read = make_read()
+        await read.read(fetch_after(0, "v1"))
+        await read.read(failing_fetch)
+        await read.read(failing_fetch)
+        await asyncio.sleep(0.06)
+        await read.read(failing_fetch)
+        await read._revalidation
+        assert read.breaker.state == OPEN
+
+    with caplog.at_level(logging.WARNING, logger="galo.resilience"):
+        asyncio.run(scenario())
+    assert sum("opened" in record.getMessage() for record in caplog.records) == 1
+
+
+def test_cold_cache_raises_circuit_open_error():
+    async def scenario():
+        read = make_read()
+        with pytest.raises(RuntimeError):
+            await read.read(failing_fetch)
+        with pytest.raises(RuntimeError):
+            await read.read(failing_fetch)
+        assert read.breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            await read.read(fetch_after(0, "v1"))
+
+    asyncio.run(scenario())
+
+
+def test_timeout_backs_off_deadline():
+    timeout = AdaptiveTimeout(initial_ms=50, min_ms=10, max_ms=200)
+    for _ in range(20):
+        timeout.observe(1)
+    assert timeout.timeout_ms == 10
+    timeout.back_off()
+    assert timeout.timeout_ms == 20
+    timeout.back_off()
+    assert timeout.timeout_ms == 40
+    for _ in range(10):
+        timeout.back_off()
+    assert timeout.timeout_ms == 200
+    timeout.observe(30)
+    assert timeout.timeout_ms < 200
+
+
+def test_recovers_when_latency_settles_above_the_learned_deadline():
+    async def scenario():
+        read = make_read(failure_threshold=3, reset_timeout=0.02)
+        # Fast reads clamp the deadline to min_ms
+        for _ in range(20):
+            await read.read(fetch_after(0, "v1"))
+        assert read.timeout.timeout_ms == 10
+
+        # Mongo settles at 40 ms: 4x the learned deadline but healthy
+        slow = fetch_after(0.04, "v2")
+        for _ in range(30):
+            value = await read.read(slow)
+            if read._revalidation is not None:
+                await read._revalidation
+            if value == "v2":
+                break
+            await asyncio.sleep(0.01)
+
+        assert read.breaker.state == CLOSED
+        assert await read.read(slow) == "v2"
+
+    asyncio.run(scenario())
+
+
+def test_deadline_is_passed_to_the_driver(monkeypatch):
+    import resilience
+
+    deadlines = []
+    active = []
+
+    class RecordingDeadline:
+        def __init__(self, seconds):
+            deadlines.append(seconds)
+
+        def __enter__(self):
+            active.append(True)
+
+        def __exit__(self, *exc):
+            active.pop()
+
+    monkeypatch.setattr(resilience, "driver_deadline", RecordingDeadline)
+
+    async def fetch():
+        # The driver call runs while the deadline is in effect
+        return bool(active)
+
+    read = make_read(initial_ms=50)
+    assert asyncio.run(read.read(fetch)) is True
+    assert deadlines == [0.05]
+
+
+def test_driver_timeout_backs_off_like_a_local_timeout():
+    class DriverTimeout(Exception):
+        timeout = True
+
+    async def fetch():
+        raise DriverTimeout()
+
+    read = make_read(initial_ms=50, max_ms=200)
+    with pytest.raises(DriverTimeout):
+        asyncio.run(read.read(fetch))
+    assert read.timeout.timeout_ms == 100
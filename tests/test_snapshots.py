@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+
+import pytest
+
+from snapshots import KEEP_VERSIONS, SnapshotStore, _content_version
+
+
+def versioned_files(directory, name):
+    return sorted(p.name for p in directory.glob(f"{name}.*.json"))
+
+
+def test_write_publishes_versioned_and_current_files(tmp_path):
+    store = SnapshotStore(tmp_path)
+    version = store.write("faqs", [{"question": "Hours?"}])
+
+    assert (tmp_path / f"faqs.{version}.json").exists()
+    assert store.load("faqs") == [{"question": "Hours?"}]
+    assert store.manifest()["faqs"]["version"] == version
+    assert store.manifest()["faqs"]["file"] == f"faqs.{version}.json"
+
+
+def test_same_content_short_circuits(tmp_path):
+    store = SnapshotStore(tmp_path)
+    version = store.write("stats", {"version": 1})
+    published_at = store.manifest()["stats"]["published_at"]
+    mtime = store.current_path("stats").stat().st_mtime_ns
+
+    assert store.write("stats", {"version": 1}) == version
+    assert store.manifest()["stats"]["published_at"] == published_at
+    assert store.current_path("stats").stat().st_mtime_ns == mtime
+
+
+def test_manifest_tracks_each_dataset(tmp_path):
+    store = SnapshotStore(tmp_path)
+    stats_v1 = store.write("stats", {"version": 1})
+    faqs_v1 = store.write("faqs", [])
+    stats_v2 = store.write("stats", {"version": 2})
+
+    manifest = store.manifest()
+    assert stats_v2 != stats_v1
+    assert manifest["stats"]["version"] == stats_v2
+    assert manifest["faqs"]["version"] == faqs_v1
+
+
+def test_old_versions_are_pruned(tmp_path):
+    store = SnapshotStore(tmp_path)
+    for i in range(KEEP_VERSIONS + 3):
+        version = store.write("testimonials", [{"n": i}])
+        # Keep mtimes distinct so pruning order is deterministic
+        os.utime(tmp_path / f"testimonials.{version}.json", ns=(i * 10**9, i * 10**9))
+
+    remaining = versioned_files(tmp_path, "testimonials")
+    assert len(remaining) == KEEP_VERSIONS
+    assert f"testimonials.{version}.json" in remaining
+
+
+def test_current_serves_a_body_matching_its_version(tmp_path):
+    store = SnapshotStore(tmp_path)
+    assert store.current("stats") is None
+
+    version = store.write("stats", {"version": 1})
+    path, current_version = store.current("stats")
+    assert current_version == version
+    assert _content_version(path.read_bytes()) == version
+
+    # A publish by another process replaces <name>.json; the cached version follows it
+    other = SnapshotStore(tmp_path)
+    new_version = other.write("stats", {"version": 2})
+    path, current_version = store.current("stats")
+    assert current_version == new_version
+    assert _content_version(path.read_bytes()) == new_version
+
+
+def test_unknown_snapshot_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        SnapshotStore(tmp_path).write("users", [])
+
+
+def _publish_many(directory, worker, rounds):
+    store = SnapshotStore(directory)
+    for i in range(rounds):
+        store.write("stats", {"worker": worker, "round": i})
+        store.write("faqs", [{"worker": worker, "round": i}])
+        current = store.current("stats")
+        if current is not None:
+            path, version = current
+            try:
+                body = path.read_bytes()
+            except FileNotFoundError:
+                # Pruned by another worker between current() and the read
+                continue
+            if _content_version(body) != version:
+                raise AssertionError(f"{path.name} does not match ETag {version}")
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_concurrent_publishers_keep_files_consistent(tmp_path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_publish_many, args=(tmp_path, n, 30)) for n in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+    assert [worker.exitcode for worker in workers] == [0, 0, 0, 0]
+
+    store = SnapshotStore(tmp_path)
+    manifest = store.manifest()
+    for name in ("stats", "faqs"):
+        data = store.current_path(name).read_bytes()
+        assert manifest[name]["version"] == _content_version(data)
+        assert (tmp_path / manifest[name]["file"]).read_bytes() == data
+        assert len(versioned_files(tmp_path, name)) <= KEEP_VERSIONS
+    assert not list(tmp_path.glob(".*.tmp"))
@@ -0,0 +1,33 @@
+import sys
+import time
+
+from startup import HEAVY_MODULES, StartupReport
+
+
+def test_status_moves_from_starting_to_degraded_to_ready():
+    report = StartupReport()
+    assert report.status == "starting"
+
+    report.record_error("warm", RuntimeError("mongo down"))
+    assert report.status == "degraded"
+    assert report.to_dict()["errors"] == {"warm": "RuntimeError('mongo down')"}
+
+    report.mark_ready()
+    assert report.status == "ready"
+    assert report.ready
+
+
+def test_phase_records_duration_even_when_it_raises():
+    report = StartupReport()
+    try:
+        with report.phase("indexes"):
+            time.sleep(0.01)
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert report.phases["indexes"] >= 10
+
+
+def test_heavy_modules_are_reported(monkeypatch):
+    monkeypatch.setitem(sys.modules, HEAVY_MODULES[0], object())
+    assert HEAVY_MODULES[0] in StartupReport().to_dict()["heavy_modules_loaded"]
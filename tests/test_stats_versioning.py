@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("email_validator")
+
+from fastapi import BackgroundTasks, HTTPException, Response  # noqa: E402
+
+import server  # noqa: E402
+
+
+class _Result:
+    def __init__(self, matched_count=0, upserted_id=None):
+        self.matched_count = matched_count
+        self.upserted_id = upserted_id
+
+
+class StubStatsCollection:
+    """company_stats holding one document at a given version"""
+
+    def __init__(self, version):
+        self.version = version
+
+    async def find_one(self, filter_=None):
+        return {"_id": server.STATS_DOC_ID, "version": self.version}
+
+    async def replace_one(self, filter_, replacement, upsert=False):
+        if filter_.get("version") == self.version:
+            self.version = replacement["version"]
+            return _Result(matched_count=1)
+        return _Result()
+
+
+class StubHistoryCollection:
+    def __init__(self):
+        self.rows = []
+
+    async def insert_many(self, rows, ordered=True):
+        self.rows.extend(rows)
+
+
+class StubDatabase:
+    def __init__(self, version):
+        self.company_stats = StubStatsCollection(version)
+        self.company_stats_history = StubHistoryCollection()
+
+
+def put_stats(if_match):
+    response = Response()
+    stats = asyncio.run(server.update_company_stats(
+        server.CompanyStats(), response, BackgroundTasks(), if_match=if_match
+    ))
+    return stats, response
+
+
+@pytest.fixture
+def stub_db(monkeypatch):
+    db = StubDatabase(version=3)
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+
+def test_parse_if_match_versions():
+    assert server.parse_if_match('"3"') == 3
+    assert server.parse_if_match('W/"3"') == 3
+    assert server.parse_if_match("*") is None
+
+
+def test_parse_if_match_rejects_garbage():
+    with pytest.raises(HTTPException) as exc_info:
+        server.parse_if_match('"abc"')
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.parametrize("display, value", [("4.9★", 4.9), ("200+", 200.0), ("99.2%", 99.2)])
+def test_parse_metric_value(display, value):
+    assert server.parse_metric_value(display) == value
+
+
+def test_stale_write_returns_412_with_current_etag(stub_db):
+    with pytest.raises(HTTPException) as exc_info:
+        put_stats('"1"')
+    assert exc_info.value.status_code == 412
+    assert exc_info.value.headers["ETag"] == '"3"'
+    assert stub_db.company_stats.version == 3
+    assert stub_db.company_stats_history.rows == []
+
+
+def test_matching_write_bumps_version_and_records_history(stub_db):
+    stats, response = put_stats('"3"')
+    assert stats.version == 4
+    assert response.headers["ETag"] == '"4"'
+    assert {row["version"] for row in stub_db.company_stats_history.rows} == {4}
+    assert len(stub_db.company_stats_history.rows) == len(server.STATS_METRICS)